@@ -1,5 +1,6 @@
 import pandas as pd
 from typing import Dict, Any
+from .linguistic import WORD_PATTERN
 
 def calculate_basic_stats(df: pd.DataFrame) -> Dict[str, Any]:
     """
@@ -23,18 +24,24 @@ def calculate_basic_stats(df: pd.DataFrame) -> Dict[str, Any]:
             "chat_end_date": None,
         }
 
-    # Filter out system messages for user-specific stats
-    user_df = df[df["sender"] != "System"].copy()
+    # Filter out system messages for user-specific stats, selecting only the columns we need
+    is_user_message = df["sender"] != "System"
+    senders = df.loc[is_user_message, "sender"]
     
-    total_messages = len(user_df)
-    messages_per_user = user_df["sender"].value_counts().to_dict()
+    total_messages = len(senders)
     
-    user_df["word_count"] = user_df["message"].apply(lambda s: len(s.split()))
+    if "_word_count" in df:
+        word_counts = df.loc[is_user_message, "_word_count"]
+    else:
+        word_counts = df.loc[is_user_message, "message"].str.count(WORD_PATTERN)
     
-    total_words = int(user_df["word_count"].sum())
-    words_per_user = user_df.groupby("sender")["word_count"].sum().astype(int).to_dict()
+    total_words = int(word_counts.sum())
     
-    avg_message_length_per_user = user_df.groupby("sender")["word_count"].mean().to_dict()
+    # Message count, word total and average message length per user in a single groupby pass
+    per_user = word_counts.groupby(senders, observed=True).agg(["size", "sum", "mean"])
+    messages_per_user = per_user["size"].sort_values(ascending=False).astype(int).to_dict()
+    words_per_user = per_user["sum"].astype(int).to_dict()
+    avg_message_length_per_user = per_user["mean"].astype(float).to_dict()
     
     chat_start_date = df["timestamp"].min()
     chat_end_date = df["timestamp"].max()
@@ -42,10 +49,10 @@ def calculate_basic_stats(df: pd.DataFrame) -> Dict[str, Any]:
     
     return {
         "total_messages": total_messages,
-        "messages_per_user": {str(k): int(v) for k, v in messages_per_user.items()},
+        "messages_per_user": messages_per_user,
         "total_words": total_words,
-        "words_per_user": {str(k): int(v) for k, v in words_per_user.items()},
-        "avg_message_length_per_user": {str(k): float(v) for k, v in avg_message_length_per_user.items()},
+        "words_per_user": words_per_user,
+        "avg_message_length_per_user": avg_message_length_per_user,
         "chat_duration_days": chat_duration.days,
         "chat_start_date": chat_start_date.strftime('%Y-%m-%d'),
         "chat_end_date": chat_end_date.strftime('%Y-%m-%d'),
@@ -1,10 +1,9 @@
 import pandas as pd
 import re
-from collections import Counter
 from typing import Dict, Any, List
 
 # Comprehensive list of English stopwords and common chat words to filter out
-STOPWORDS = {
+STOPWORDS = frozenset({
     # Common English words
     "a", "about", "above", "after", "again", "against", "all", "am", "an", "and", "any", "are", "as", "at",
     "be", "because", "been", "before", "being", "below", "between", "both", "but", "by", "can", "cant", "cannot",
@@ -30,7 +29,32 @@ STOPWORDS = {
     
     # Single letters and numbers often noise
     "u", "ur", "r", "n", "m", "k", "x", "b", "c", "d", "e", "f", "g", "h", "j", "l", "o", "p", "q", "v", "w", "y", "z",
-}
+})
+
+# Words as counted and tokenized by the analytics
+WORD_PATTERN = r'\b\w+\b'
+WORD_REGEX = re.compile(WORD_PATTERN)
+
+# Letters only: ``\w`` without digits and underscores
+LETTER_PATTERN = r"[^\W\d_]"
+
+# Matches words made of at most two distinct characters (e.g. "hahaha", "ahhhh")
+REPETITIVE_CHARS_PATTERN = r"(.)\1*(?:(.)(?:\1|\2)*)?"
+
+def add_message_tokens(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Tokenizes every message once so the analytics functions can share the result.
+
+    Args:
+        df: The chat DataFrame.
+
+    Returns:
+        A copy of the DataFrame with `_tokens` (lowercase words per message)
+        and `_word_count` columns added.
+    """
+    tokens = df["message"].str.lower().map(WORD_REGEX.findall)
+    return df.assign(_tokens=tokens, _word_count=tokens.str.len())
+
 
 def is_valid_word(word: str, min_length: int = 3) -> bool:
     """
@@ -76,6 +100,29 @@ def is_valid_word(word: str, min_length: int = 3) -> bool:
     return True
 
 
+def valid_word_mask(words: pd.Series, min_length: int = 3) -> pd.Series:
+    """
+    Vectorized equivalent of `is_valid_word` for a Series of lowercase words.
+
+    Args:
+        words: The words to validate (no missing values)
+        min_length: Minimum length for a word to be considered valid
+
+    Returns:
+        A boolean Series aligned with `words`, True where the word is valid
+    """
+    lengths = words.str.len()
+    alpha_ratio = words.str.count(LETTER_PATTERN) / lengths
+
+    # A letter ratio of at least 0.6 also rules out pure numbers and words without letters
+    return (
+        ~words.isin(STOPWORDS)
+        & (lengths >= min_length)
+        & (alpha_ratio >= 0.6)
+        & ~(words.str.fullmatch(REPETITIVE_CHARS_PATTERN) & (lengths > 3))
+    )
+
+
 def calculate_linguistic_stats(df: pd.DataFrame, top_n: int = 20) -> Dict[str, Any]:
     """
     Calculates linguistic statistics like most common words.
@@ -93,26 +140,44 @@ def calculate_linguistic_stats(df: pd.DataFrame, top_n: int = 20) -> Dict[str, A
             "most_common_words_per_user": {},
         }
     
-    user_df = df[(df["sender"] != "System") & (df["message_type"] == "text")].copy()
+    if "_tokens" not in df:
+        df = add_message_tokens(df)
+    
+    is_user_text = (df["sender"] != "System") & (df["message_type"] == "text")
+    user_df = df.loc[is_user_text, ["sender", "_tokens"]]
 
-    # Pre-process text: lowercase, remove non-alphanumeric, split into words
-    words = user_df["message"].str.lower().str.findall(r'\b\w+\b').explode()
+    # Keep the sender next to every word of the pre-tokenized messages
+    words_df = user_df[["sender"]].assign(word=user_df["_tokens"]).explode("word").dropna(subset=["word"])
     
-    # Filter using our validation function
-    words = words[words.apply(lambda x: is_valid_word(x))]
+    # Filter using our validation rules, checking each distinct word only once
+    codes, vocabulary = pd.factorize(words_df["word"])
+    is_valid = valid_word_mask(pd.Series(vocabulary, dtype=object)).to_numpy()
+    words_df = words_df[is_valid[codes]]
     
+    # Count (sender, word) pairs in a single pass; both rankings below are derived from it
+    word_counts = words_df.groupby(["sender", "word"], sort=False, observed=True).size()
+
     # Overall most common words
-    most_common_words_counts = Counter(words).most_common(top_n)
-    most_common_words = [{"word": word, "count": count} for word, count in most_common_words_counts]
+    # A stable sort keeps ties in first-appearance order (like Counter.most_common) on every
+    # pandas version; nlargest falls back to an unstable sort when top_n covers every word
+    most_common_words_counts = (
+        word_counts.groupby(level="word", sort=False).sum()
+        .sort_values(ascending=False, kind="stable")
+        .head(top_n)
+    )
+    most_common_words = [{"word": word, "count": int(count)} for word, count in most_common_words_counts.items()]
 
     # Most common words per user
-    most_common_words_per_user = {}
-    for sender in user_df["sender"].unique():
-        sender_words = user_df[user_df["sender"] == sender]["message"].str.lower().str.findall(r'\b\w+\b').explode()
-        sender_words = sender_words[sender_words.apply(lambda x: is_valid_word(x))]
-        
-        counts = Counter(sender_words).most_common(top_n)
-        most_common_words_per_user[sender] = [{"word": word, "count": count} for word, count in counts]
+    # Sorted stably once, then each sender's first top_n rows are their top words in tie-stable order
+    top_word_counts = (
+        word_counts.sort_values(ascending=False, kind="stable")
+        .groupby(level="sender", sort=False, observed=True)
+        .head(top_n)
+    )
+
+    most_common_words_per_user = {sender: [] for sender in user_df["sender"].unique()}
+    for (sender, word), count in top_word_counts.items():
+        most_common_words_per_user[sender].append({"word": word, "count": int(count)})
 
     return {
         "most_common_words": most_common_words,
@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 from typing import Dict, Any, List
 
@@ -20,42 +21,48 @@ def calculate_temporal_stats(df: pd.DataFrame) -> Dict[str, Any]:
             "activity_by_day_of_week": [],
         }
 
-    user_df = df[df["sender"] != "System"].copy()
+    timestamps = df.loc[df["sender"] != "System", "timestamp"]
     
+    # Derive each calendar field once and reuse it for every aggregation below.
+    # Hours and weekdays are small dense ranges, so they are counted by direct indexing.
+    hour_counts = np.bincount(timestamps.dt.hour.to_numpy(), minlength=24)
+    day_of_week_counts = np.bincount(timestamps.dt.dayofweek.to_numpy(), minlength=7)
+
+    # Daily message volume, binned on the datetime values themselves; days without messages are dropped
+    daily_counts = timestamps.to_frame().set_index("timestamp").resample("D").size()
+    daily_counts = daily_counts[daily_counts > 0]
+
     # Most active day and hour
-    most_active_day = user_df["timestamp"].dt.date.value_counts().idxmax()
-    most_active_hour = user_df["timestamp"].dt.hour.value_counts().idxmax()
-    
+    most_active_day = daily_counts.idxmax()
+    most_active_hour = hour_counts.argmax()
+
     # Get most active day of week name
-    most_active_day_of_week_idx = user_df["timestamp"].dt.dayofweek.value_counts().idxmax()
+    most_active_day_of_week_idx = int(day_of_week_counts.argmax())
     day_name_map = {0: 'Monday', 1: 'Tuesday', 2: 'Wednesday', 3: 'Thursday', 4: 'Friday', 5: 'Saturday', 6: 'Sunday'}
     most_active_day_name = day_name_map[most_active_day_of_week_idx]
 
     # Message volume over time (e.g., daily)
-    user_df['date'] = user_df['timestamp'].dt.date
-    daily_volume = user_df.groupby('date').size().reset_index(name='message_count')
+    dates = daily_counts.index.strftime('%Y-%m-%d').tolist()
     message_volume_over_time = [
-        {"date": str(row.date), "message_count": row.message_count}
-        for row in daily_volume.itertuples()
+        {"date": date, "message_count": count}
+        for date, count in zip(dates, daily_counts.tolist())
     ]
-    
+
     # Activity by hour of the day
-    hourly_activity = user_df["timestamp"].dt.hour.value_counts().sort_index()
     activity_by_hour = [
-        {"hour": int(hour), "message_count": int(count)}
-        for hour, count in hourly_activity.items()
+        {"hour": hour, "message_count": int(count)}
+        for hour, count in enumerate(hour_counts) if count
     ]
 
     # Activity by day of the week
     day_map = {0: 'Mon', 1: 'Tue', 2: 'Wed', 3: 'Thu', 4: 'Fri', 5: 'Sat', 6: 'Sun'}
-    day_of_week_activity = user_df["timestamp"].dt.dayofweek.value_counts().sort_index()
     activity_by_day_of_week = [
         {"day": day_map[day_idx], "message_count": int(count)}
-        for day_idx, count in day_of_week_activity.items()
+        for day_idx, count in enumerate(day_of_week_counts) if count
     ]
     
     return {
-        "most_active_day": str(most_active_day),
+        "most_active_day": most_active_day.strftime('%Y-%m-%d'),
         "most_active_day_name": most_active_day_name,
         "most_active_hour": int(most_active_hour),
         "message_volume_over_time": message_volume_over_time,
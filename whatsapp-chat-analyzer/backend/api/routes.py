@@ -1,24 +1,32 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
-from typing import Optional, Literal
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Response
+from fastapi.responses import StreamingResponse
+from typing import Optional, Literal, List, Tuple
+from pydantic import ValidationError
+import asyncio
+import json
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-from ..utils.file_utils import extract_zip, find_chat_file, find_media_files
+from ..utils.file_utils import extract_zip, scan_extracted
 from ..parser.whatsapp_parser import parse_chat_file
 from ..media.audio_transcription import transcribe_audio_files, merge_transcriptions_into_chat
 from ..analytics.basic_stats import calculate_basic_stats
 from ..analytics.temporal import calculate_temporal_stats
-from ..analytics.linguistic import calculate_linguistic_stats
-from ..insights.insight_engine import get_insights
-from ..llm.llm_client import get_llm_client
-from .schemas import AnalysisResult
+from ..analytics.linguistic import calculate_linguistic_stats, add_message_tokens
+from ..insights.insight_engine import get_insights, aget_insights, generate_prompt
+from ..llm.llm_client import LLMClient, get_llm_client
+from .schemas import (
+    AnalysisResult, BasicStats, TemporalStats, LinguisticStats,
+    InsightRequest, InsightResponse, SubRequest, SubResponse,
+)
 
 router = APIRouter()
 
-@router.post("/upload", response_model=AnalysisResult)
+# The response is built from our own analytics output, so it is documented with the
+# AnalysisResult schema but neither validated again nor passed through jsonable_encoder:
+# it is assembled with model_construct and serialized directly by pydantic-core.
+@router.post("/upload", response_model=None, responses={200: {"model": AnalysisResult}})
 async def upload_chat_and_analyze(
     file: UploadFile = File(...),
     enable_transcription: bool = Form(False),
@@ -26,62 +34,64 @@ async def upload_chat_and_analyze(
     llm_provider: Optional[Literal["gemini", "openai", "ollama"]] = Form(None),
     llm_api_key_or_url: Optional[str] = Form(None),
 ):
-    logger.info("\n" + "=" * 70)
-    logger.info("🚀 NEW ANALYSIS REQUEST RECEIVED")
-    logger.info("=" * 70)
-    logger.info(f"📁 File: {file.filename}")
-    logger.info(f"🎙️  Transcription enabled: {enable_transcription}")
-    logger.info(f"✨ AI insights enabled: {enable_ai_insights}")
-    if enable_ai_insights:
-        logger.info(f"🤖 LLM Provider: {llm_provider}")
+    # Log formatting is lazy (%-style) and the decorative banners are only built in debug mode
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("\n%s\n🚀 NEW ANALYSIS REQUEST RECEIVED\n%s", "=" * 70, "=" * 70)
+    logger.info(
+        "📁 New analysis request: file=%s, transcription=%s, ai_insights=%s, llm_provider=%s",
+        file.filename, enable_transcription, enable_ai_insights, llm_provider,
+    )
     
     if not file.filename.endswith(".zip"):
-        logger.error(f"❌ Invalid file type: {file.filename}")
+        logger.error("❌ Invalid file type: %s", file.filename)
         raise HTTPException(status_code=400, detail="Invalid file type. Please upload a ZIP file.")
 
-    zip_content = await file.read()
-    logger.info(f"📦 ZIP file size: {len(zip_content)} bytes")
+    logger.info("📦 ZIP file size: %s bytes", file.size)
     
+    # Extraction, parsing, transcription and analytics are blocking CPU/disk work,
+    # so they run in worker threads to keep the event loop free for other requests.
     try:
         logger.info("📂 Extracting ZIP archive...")
-        temp_dir = extract_zip(zip_content)
-        logger.info(f"✅ Extracted to: {temp_dir.name}")
+        # Read the archive straight from the upload's spooled file instead of buffering it;
+        # audio is only extracted when it is going to be transcribed
+        temp_dir = await asyncio.to_thread(extract_zip, file.file, enable_transcription)
+        logger.info("✅ Extracted to: %s", temp_dir.name)
         
-        logger.info("🔍 Looking for chat file...")
-        chat_file_path = find_chat_file(temp_dir.name)
-        logger.info(f"✅ Found chat file: {chat_file_path}")
+        logger.info("🔍 Looking for chat and media files...")
+        # One directory walk finds both the chat file and the media files
+        chat_file_path, media_files = await asyncio.to_thread(scan_extracted, temp_dir.name)
+        logger.info("✅ Found chat file: %s", chat_file_path)
         
         # 1. Parse chat file to get initial DataFrame
         logger.info("📖 Parsing chat file...")
-        df = parse_chat_file(chat_file_path)
+        df = await asyncio.to_thread(parse_chat_file, chat_file_path)
         if df.empty:
             logger.error("❌ Chat DataFrame is empty after parsing")
             raise HTTPException(status_code=400, detail="Could not parse chat file or file is empty.")
-        logger.info(f"✅ Parsed {len(df)} messages")
+        logger.info("✅ Parsed %d messages", len(df))
 
         transcription_results = None
         # 2. (Optional) Transcribe audio and merge results
         if enable_transcription:
-            logger.info("\n" + "🎙️" * 30)
-            logger.info("🎙️  TRANSCRIPTION REQUESTED - Starting audio processing...")
-            logger.info("🎙️" * 30)
-            media_files = list(find_media_files(temp_dir.name))
-            logger.info(f"📁 Found {len(media_files)} total media files")
-            transcriptions = transcribe_audio_files(media_files, df)
-            df = merge_transcriptions_into_chat(df, transcriptions)
+            logger.info("🎙️  Transcription requested - starting audio processing...")
+            logger.info("📁 Found %d total media files", len(media_files))
+            transcriptions = await asyncio.to_thread(transcribe_audio_files, media_files, df)
+            df = await asyncio.to_thread(merge_transcriptions_into_chat, df, transcriptions)
             # Make transcriptions JSON serializable
             transcription_results = [
                 {**t, "timestamp": t["timestamp"].isoformat()} for t in transcriptions
             ]
-            logger.info(f"✅ Transcription complete. Generated {len(transcription_results)} results")
+            logger.info("✅ Transcription complete. Generated %d results", len(transcription_results))
         else:
             logger.info("⏭️  Transcription skipped (not enabled)")
 
         # 3. Calculate all analytics on the final DataFrame
-        logger.info("\n📊 Calculating analytics...")
-        basic_stats = calculate_basic_stats(df)
-        temporal_stats = calculate_temporal_stats(df)
-        linguistic_stats = calculate_linguistic_stats(df)
+        logger.info("📊 Calculating analytics...")
+        df["sender"] = df["sender"].astype("category")  # Group senders by integer codes
+        df = await asyncio.to_thread(add_message_tokens, df)  # Tokenize once, shared by basic and linguistic stats
+        basic_stats = await asyncio.to_thread(calculate_basic_stats, df)
+        temporal_stats = await asyncio.to_thread(calculate_temporal_stats, df)
+        linguistic_stats = await asyncio.to_thread(calculate_linguistic_stats, df)
         logger.info("✅ Analytics calculated successfully")
 
         analytics_data = {
@@ -93,14 +103,14 @@ async def upload_chat_and_analyze(
         # 4. (Optional) Generate insights
         insights_result = None
         if enable_ai_insights:
-            logger.info("\n✨ Generating AI insights...")
+            logger.info("✨ Generating AI insights...")
             try:
                 # Use strict=True to ensure errors are raised if config is missing
                 llm_client = get_llm_client(llm_provider, llm_api_key_or_url, strict=True)
-                insights_result = get_insights(analytics_data, llm_client)
+                insights_result = await aget_insights(analytics_data, llm_client)
                 logger.info("✅ AI insights generated successfully")
             except Exception as e:
-                logger.error(f"❌ Error generating AI insights: {e}")
+                logger.error("❌ Error generating AI insights: %s", e)
                 insights_result = f"AI insights were enabled, but an error occurred:\n\n{e}"
         else:
             logger.info("📝 Generating mock insights (AI disabled)...")
@@ -111,23 +121,132 @@ async def upload_chat_and_analyze(
         temp_dir.cleanup()
         logger.info("🧹 Cleaned up temporary files")
 
-        logger.info("\n" + "=" * 70)
-        logger.info("✅ ANALYSIS COMPLETE - Sending response to client")
-        logger.info("=" * 70 + "\n")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("\n%s\n✅ ANALYSIS COMPLETE - Sending response to client\n%s\n", "=" * 70, "=" * 70)
+        logger.info("✅ Analysis complete")
 
         # 6. Format and return response
-        return AnalysisResult(
-            basic_stats=basic_stats,
-            temporal_stats=temporal_stats,
-            linguistic_stats=linguistic_stats,
+        result = AnalysisResult.model_construct(
+            basic_stats=BasicStats.model_construct(**basic_stats),
+            temporal_stats=TemporalStats.model_construct(**temporal_stats),
+            linguistic_stats=LinguisticStats.model_construct(**linguistic_stats),
             transcriptions=transcription_results,
             insights=insights_result,
         )
+        return Response(content=result.model_dump_json(), media_type="application/json")
 
     except FileNotFoundError as e:
-        logger.error(f"❌ File not found: {e}")
+        logger.error("❌ File not found: %s", e)
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         # Generic error for any other unhandled exception
-        logger.error(f"❌ Unexpected error: {e}", exc_info=True)
+        logger.error("❌ Unexpected error: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {e}")
+
+def _prepare_insight_request(request: InsightRequest) -> Tuple[LLMClient, str]:
+    """
+    Creates the LLM client for an insight request and builds its prompt.
+    A missing SDK or invalid provider configuration is reported as a 400 error.
+    """
+    try:
+        llm_client = get_llm_client(request.llm_provider, request.llm_api_key_or_url, strict=True)
+    except (ImportError, ValueError) as e:
+        logger.error("❌ Error initializing LLM client: %s", e)
+        raise HTTPException(status_code=400, detail=str(e))
+
+    analytics_data = request.model_dump(include={"basic_stats", "temporal_stats", "linguistic_stats"})
+    return llm_client, generate_prompt(analytics_data)
+
+@router.post("/insights/stream")
+async def stream_insights(request: InsightRequest):
+    """
+    Streams AI insights for previously computed analytics as server-sent events.
+    Each event carries a {"token": ...} piece of text; the stream ends with a
+    "done" event, or an "error" event if the provider fails midway.
+    """
+    logger.info("✨ Streaming AI insights: llm_provider=%s", request.llm_provider)
+    llm_client, prompt = _prepare_insight_request(request)
+
+    async def event_stream():
+        try:
+            async for token in llm_client.astream_insight(prompt):
+                yield f"data: {json.dumps({'token': token})}\n\n"
+        except Exception as e:
+            logger.error("❌ Error streaming AI insights: %s", e)
+            yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+        else:
+            logger.info("✅ AI insights streamed successfully")
+            yield "event: done\ndata: {}\n\n"
+
+    # Disable caching and proxy buffering so every token reaches the client as soon as it is produced
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.post("/insights", response_model=InsightResponse)
+async def generate_insights(request: InsightRequest) -> InsightResponse:
+    """
+    Generates AI insights for previously computed analytics and returns them in one response.
+    """
+    logger.info("✨ Generating AI insights: llm_provider=%s", request.llm_provider)
+    llm_client, prompt = _prepare_insight_request(request)
+    try:
+        insights = await llm_client.agenerate_insight(prompt)
+    except Exception as e:
+        logger.error("❌ Error generating AI insights: %s", e)
+        raise HTTPException(status_code=502, detail=f"The LLM provider returned an error: {e}")
+    logger.info("✅ AI insights generated successfully")
+    return InsightResponse(insights=insights)
+
+# Routes that can be called through /batch, keyed by (method, path relative to the API prefix).
+# Each entry holds the route's handler and the model its JSON body is validated against.
+BATCH_ROUTES = {
+    ("POST", "/insights"): (generate_insights, InsightRequest),
+}
+MAX_BATCH_SIZE = 20
+
+async def dispatch_sub_request(sub_request: SubRequest) -> SubResponse:
+    """
+    Runs a single batched sub-request through its route handler.
+    Failures are reported in the sub-response's status instead of failing the whole batch.
+    """
+    route = BATCH_ROUTES.get((sub_request.method.upper(), sub_request.path))
+    if route is None:
+        return SubResponse(
+            id=sub_request.id,
+            status=404,
+            body={"detail": f"No batchable route for {sub_request.method} {sub_request.path}"},
+        )
+
+    handler, body_model = route
+    try:
+        result = await handler(body_model.model_validate(sub_request.body or {}))
+    except ValidationError as e:
+        return SubResponse(
+            id=sub_request.id,
+            status=422,
+            body={"detail": e.errors(include_url=False, include_context=False)},
+        )
+    except HTTPException as e:
+        return SubResponse(id=sub_request.id, status=e.status_code, body={"detail": e.detail})
+    except Exception as e:
+        logger.error("❌ Unexpected error in batched request %s: %s", sub_request.id, e, exc_info=True)
+        return SubResponse(
+            id=sub_request.id, status=500, body={"detail": f"An unexpected error occurred: {e}"}
+        )
+    return SubResponse(id=sub_request.id, status=200, body=result.model_dump(mode="json"))
+
+@router.post("/batch", response_model=List[SubResponse])
+async def batch(sub_requests: List[SubRequest]) -> List[SubResponse]:
+    """
+    Runs several JSON API calls in one round trip. The sub-requests are executed
+    concurrently and their responses are returned in the order they were sent.
+    """
+    if len(sub_requests) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=400, detail=f"A batch can contain at most {MAX_BATCH_SIZE} requests."
+        )
+    logger.info("📦 Running a batch of %d requests", len(sub_requests))
+    return await asyncio.gather(*(dispatch_sub_request(r) for r in sub_requests))
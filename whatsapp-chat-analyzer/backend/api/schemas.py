@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Literal
 
 class BasicStats(BaseModel):
     total_messages: int
@@ -33,3 +33,24 @@ class AnalysisResult(BaseModel):
     linguistic_stats: LinguisticStats
     transcriptions: Optional[List[Dict[str, Any]]] = None
     insights: Optional[str] = None
+
+class InsightRequest(BaseModel):
+    basic_stats: BasicStats
+    temporal_stats: TemporalStats
+    linguistic_stats: LinguisticStats
+    llm_provider: Literal["gemini", "openai", "ollama"]
+    llm_api_key_or_url: Optional[str] = None
+
+class InsightResponse(BaseModel):
+    insights: str
+
+class SubRequest(BaseModel):
+    id: str
+    method: str = "POST"
+    path: str  # Route path relative to the API prefix, e.g. "/insights"
+    body: Optional[Dict[str, Any]] = None
+
+class SubResponse(BaseModel):
+    id: str
+    status: int
+    body: Dict[str, Any]
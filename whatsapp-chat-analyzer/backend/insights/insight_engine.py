@@ -23,8 +23,8 @@ def generate_prompt(analytics_data: Dict[str, Any]) -> str:
     Here is the data:
     """
     
-    # Pretty-print JSON to make it readable for the LLM
-    prompt += json.dumps(analytics_data, indent=2)
+    # Compact JSON reads just as well for the LLM and keeps the prompt (and token count) small
+    prompt += json.dumps(analytics_data, separators=(",", ":"), ensure_ascii=False)
     
     prompt += f"""
     
@@ -95,6 +95,30 @@ def get_insights(
     else:
         return generate_mock_summary(analytics_data)
 
+async def aget_insights(
+    analytics_data: Dict[str, Any],
+    llm_client: Optional[LLMClient] = None
+) -> str:
+    """
+    Async version of get_insights that awaits the LLM without blocking the event loop.
+
+    Args:
+        analytics_data: A dictionary of computed analytics.
+        llm_client: An optional initialized LLM client.
+
+    Returns:
+        A string containing the generated or mock insights.
+    """
+    if llm_client:
+        try:
+            prompt = generate_prompt(analytics_data)
+            insight = await llm_client.agenerate_insight(prompt)
+            return insight
+        except Exception as e:
+            return f"An error occurred while generating AI insights: {e}"
+    else:
+        return generate_mock_summary(analytics_data)
+
 def generate_mock_summary(analytics_data: Dict[str, Any]) -> str:
     """
     Generates an insightful summary based on the analytics data.
@@ -125,30 +149,31 @@ def generate_mock_summary(analytics_data: Dict[str, Any]) -> str:
         has_sufficient_data = total_messages >= 50
         
         if messages_per_user:
-            users = list(messages_per_user.keys())
-            most_active_user = max(messages_per_user, key=messages_per_user.get)
+            users = list(messages_per_user.items())
+            # Sort once (stable, so ties keep their order) and reuse the top entry below
+            sorted_users = sorted(users, key=lambda item: item[1], reverse=True)
+            most_active_user, most_active_count = sorted_users[0]
             
             summary += f"**👥 Communication Dynamics**\n"
             
             # Balance analysis - only if sufficient data
             if len(users) == 2 and has_sufficient_data:
-                user1, user2 = users
-                ratio = messages_per_user[user1] / max(messages_per_user[user2], 1)
+                (_, user1_count), (_, user2_count) = users
+                ratio = user1_count / max(user2_count, 1)
                 if 0.8 <= ratio <= 1.2:
                     summary += f"- Beautifully balanced conversation - both participants contribute equally! 🤝\n"
                 elif ratio > 1.5 or ratio < 0.67:
-                    summary += f"- {most_active_user} is the conversation driver, sending {messages_per_user[most_active_user]} messages 💬\n"
+                    summary += f"- {most_active_user} is the conversation driver, sending {most_active_count} messages 💬\n"
                 else:
-                    summary += f"- {most_active_user} leads the conversation with {messages_per_user[most_active_user]} messages\n"
+                    summary += f"- {most_active_user} leads the conversation with {most_active_count} messages\n"
             elif len(users) == 2:
                 # With limited data, just state facts
-                user1, user2 = users
-                summary += f"- {user1}: {messages_per_user[user1]} messages | {user2}: {messages_per_user[user2]} messages\n"
+                (user1, user1_count), (user2, user2_count) = users
+                summary += f"- {user1}: {user1_count} messages | {user2}: {user2_count} messages\n"
             
             # Individual styles - be more flexible
             summary += f"\n**🎭 Communication Approaches**\n"
-            for user in users:
-                msg_count = messages_per_user.get(user, 0)
+            for user, _ in users:
                 avg_words = avg_length_per_user.get(user, 0)
                 
                 # More flexible descriptions
@@ -1,6 +1,11 @@
-from typing import Optional, Literal
+from typing import Optional, Literal, List, Union, AsyncIterator
+import asyncio
+import hashlib
+import logging
 import os
 
+logger = logging.getLogger(__name__)
+
 # Mock LLM libraries
 try:
     import google.generativeai as genai
@@ -9,7 +14,7 @@ except ImportError:
     GOOGLE_AVAILABLE = False
 
 try:
-    from openai import OpenAI
+    from openai import OpenAI, AsyncOpenAI
     OPENAI_AVAILABLE = True
 except ImportError:
     OPENAI_AVAILABLE = False
@@ -20,13 +25,47 @@ try:
 except ImportError:
     OLLAMA_AVAILABLE = False
 
+try:
+    import diskcache
+    DISKCACHE_AVAILABLE = True
+except ImportError:
+    DISKCACHE_AVAILABLE = False
+
 LLMProvider = Literal["gemini", "openai", "ollama"]
 
+DEFAULT_MODELS = {
+    "gemini": "gemini-pro",
+    "openai": "gpt-3.5-turbo",
+    "ollama": "llama2",
+}
+
+# Optional on-disk cache of LLM responses, so repeating an analysis does not call the provider again.
+# Prompts are built from chat analytics, so nothing is written to disk unless LLM_CACHE_DIR is set.
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR")
+DEFAULT_LLM_CACHE_TTL_SECONDS = 24 * 60 * 60
+try:
+    LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", DEFAULT_LLM_CACHE_TTL_SECONDS))
+except ValueError:
+    logger.warning(
+        "⚠️ LLM_CACHE_TTL_SECONDS=%r is not a whole number of seconds; using the default of %s",
+        os.getenv("LLM_CACHE_TTL_SECONDS"), DEFAULT_LLM_CACHE_TTL_SECONDS,
+    )
+    LLM_CACHE_TTL_SECONDS = DEFAULT_LLM_CACHE_TTL_SECONDS
+
+if LLM_CACHE_DIR and DISKCACHE_AVAILABLE:
+    response_cache = diskcache.Cache(os.path.expanduser(LLM_CACHE_DIR))
+else:
+    response_cache = None
+    if LLM_CACHE_DIR:
+        logger.warning("⚠️ LLM_CACHE_DIR is set but diskcache is not installed; LLM responses will not be cached.")
+
 class LLMClient:
     def __init__(self, provider: LLMProvider, api_key_or_url: Optional[str] = None):
         self.provider = provider
         self.api_key_or_url = api_key_or_url
+        self.model = DEFAULT_MODELS.get(provider)
         self._client = self._initialize_client()
+        self._async_client = self._initialize_async_client()
 
     def _initialize_client(self):
         if self.provider == "gemini":
@@ -35,7 +74,7 @@ class LLMClient:
             if not self.api_key_or_url:
                 raise ValueError("API key is required for Gemini.")
             genai.configure(api_key=self.api_key_or_url)
-            return genai.GenerativeModel('gemini-pro')
+            return genai.GenerativeModel(self.model)
         
         elif self.provider == "openai":
             if not OPENAI_AVAILABLE:
@@ -53,31 +92,167 @@ class LLMClient:
         else:
             raise ValueError(f"Unsupported LLM provider: {self.provider}")
 
+    def _initialize_async_client(self):
+        # Called after _initialize_client, which has already validated the provider and its config
+        if self.provider == "gemini":
+            # The Gemini model object exposes its async API (generate_content_async) directly
+            return self._client
+
+        elif self.provider == "openai":
+            return AsyncOpenAI(api_key=self.api_key_or_url)
+
+        elif self.provider == "ollama":
+            return ollama.AsyncClient(host=self.api_key_or_url)
+
+    def _cache_key(self, prompt: str) -> str:
+        return hashlib.sha256(f"{self.provider}|{self.model}|{prompt}".encode("utf-8")).hexdigest()
+
     def generate_insight(self, prompt: str) -> str:
         """
         Generates text using the configured LLM provider.
+        Responses are served from the on-disk cache when it is enabled.
         """
+        if response_cache is not None:
+            cache_key = self._cache_key(prompt)
+            cached = response_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
         try:
             if self.provider == "gemini":
                 response = self._client.generate_content(prompt)
-                return response.text
+                insight = response.text
 
             elif self.provider == "openai":
                 chat_completion = self._client.chat.completions.create(
                     messages=[{"role": "user", "content": prompt}],
-                    model="gpt-3.5-turbo",
+                    model=self.model,
                 )
-                return chat_completion.choices[0].message.content
+                insight = chat_completion.choices[0].message.content
 
             elif self.provider == "ollama":
                 # Ensure the model is specified. Defaulting to 'llama2' if not part of the client setup.
                 # A more robust solution might pass the model name during generation.
-                response = self._client.generate(model='llama2', prompt=prompt)
-                return response['response']
+                response = self._client.generate(model=self.model, prompt=prompt)
+                insight = response['response']
+
+        except Exception as e:
+            raise RuntimeError(f"Failed to generate insight from {self.provider}: {e}") from e
+
+        if response_cache is not None:
+            response_cache.set(cache_key, insight, expire=LLM_CACHE_TTL_SECONDS)
+        return insight
+
+    async def agenerate_insight(self, prompt: str) -> str:
+        """
+        Generates text using the configured LLM provider's async client, so the
+        event loop stays free (and other prompts can run) while waiting on the provider.
+        Responses are served from the on-disk cache when it is enabled.
+        """
+        if response_cache is not None:
+            # diskcache is SQLite underneath and may wait on a lock, so it is kept off the event loop
+            cache_key = self._cache_key(prompt)
+            cached = await asyncio.to_thread(response_cache.get, cache_key)
+            if cached is not None:
+                return cached
+
+        try:
+            if self.provider == "gemini":
+                response = await self._async_client.generate_content_async(prompt)
+                insight = response.text
+
+            elif self.provider == "openai":
+                chat_completion = await self._async_client.chat.completions.create(
+                    messages=[{"role": "user", "content": prompt}],
+                    model=self.model,
+                )
+                insight = chat_completion.choices[0].message.content
+
+            elif self.provider == "ollama":
+                response = await self._async_client.generate(model=self.model, prompt=prompt)
+                insight = response['response']
+
+        except Exception as e:
+            raise RuntimeError(f"Failed to generate insight from {self.provider}: {e}") from e
+
+        if response_cache is not None:
+            await asyncio.to_thread(response_cache.set, cache_key, insight, expire=LLM_CACHE_TTL_SECONDS)
+        return insight
+
+    async def astream_insight(self, prompt: str) -> AsyncIterator[str]:
+        """
+        Streams the generated text piece by piece as the LLM provider produces it.
+        A cached response is yielded as a single piece; a completed stream is cached.
+        """
+        if response_cache is not None:
+            cache_key = self._cache_key(prompt)
+            cached = await asyncio.to_thread(response_cache.get, cache_key)
+            if cached is not None:
+                yield cached
+                return
+
+        pieces = []
+        try:
+            if self.provider == "gemini":
+                response = await self._async_client.generate_content_async(prompt, stream=True)
+                async for chunk in response:
+                    pieces.append(chunk.text)
+                    yield chunk.text
+
+            elif self.provider == "openai":
+                stream = await self._async_client.chat.completions.create(
+                    messages=[{"role": "user", "content": prompt}],
+                    model=self.model,
+                    stream=True,
+                )
+                async for chunk in stream:
+                    text = chunk.choices[0].delta.content if chunk.choices else None
+                    if text:
+                        pieces.append(text)
+                        yield text
+
+            elif self.provider == "ollama":
+                stream = await self._async_client.generate(model=self.model, prompt=prompt, stream=True)
+                async for part in stream:
+                    pieces.append(part['response'])
+                    yield part['response']
 
         except Exception as e:
             raise RuntimeError(f"Failed to generate insight from {self.provider}: {e}") from e
 
+        if response_cache is not None:
+            await asyncio.to_thread(
+                response_cache.set, cache_key, "".join(pieces), expire=LLM_CACHE_TTL_SECONDS
+            )
+
+    async def agenerate_insights(
+        self,
+        prompts: List[str],
+        max_concurrency: int = 32
+    ) -> List[Union[str, Exception]]:
+        """
+        Generates text for many prompts concurrently.
+
+        Args:
+            prompts: The prompts to send to the LLM provider.
+            max_concurrency: The maximum number of requests in flight at once,
+                to stay within the provider's rate limits.
+
+        Returns:
+            The generated text for each prompt, in the same order. A prompt that
+            failed yields its exception instead of aborting the whole batch.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def generate_one(prompt: str) -> str:
+            async with semaphore:
+                return await self.agenerate_insight(prompt)
+
+        return await asyncio.gather(
+            *(generate_one(prompt) for prompt in prompts),
+            return_exceptions=True,
+        )
+
 def get_llm_client(
     provider: LLMProvider, 
     api_key_or_url: Optional[str] = None,
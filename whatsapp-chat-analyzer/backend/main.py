@@ -1,5 +1,10 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+import logging
+
+# Configure logging once for the whole app, before the routes (and the modules they import) log anything
+logging.basicConfig(level=logging.INFO)
+
 from .api import routes
 
 app = FastAPI(
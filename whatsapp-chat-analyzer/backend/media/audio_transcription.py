@@ -1,21 +1,169 @@
 from typing import List, Dict, Any, Tuple
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+import os
+import threading
+import numpy as np
 import pandas as pd
 import logging
+from ..utils.file_utils import AUDIO_EXTENSIONS
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# faster-whisper (CTranslate2, int8 weights) is several times faster on CPU than the
+# reference openai-whisper implementation, which is only used as a fallback
+try:
+    from faster_whisper import WhisperModel
+    FASTER_WHISPER_AVAILABLE = True
+    logger.info("✅ faster-whisper module successfully imported and available")
+except ImportError:
+    FASTER_WHISPER_AVAILABLE = False
+    WhisperModel = None
+
 # Mock whisper for now to avoid heavy dependency
 try:
     import whisper
-    WHISPER_AVAILABLE = True
-    logger.info("✅ Whisper module successfully imported and available")
 except ImportError:
-    WHISPER_AVAILABLE = False
     whisper = None
+
+WHISPER_AVAILABLE = FASTER_WHISPER_AVAILABLE or whisper is not None
+if not FASTER_WHISPER_AVAILABLE and WHISPER_AVAILABLE:
+    logger.info("✅ Whisper module successfully imported and available")
+elif not WHISPER_AVAILABLE:
     logger.warning("⚠️ Whisper module not available - transcription will be skipped")
 
+def _resolve_device(device: str) -> str:
+    """
+    Resolves "auto" to "cuda" when the installed Whisper backend can see a CUDA GPU,
+    and to "cpu" otherwise. Other device names are returned unchanged.
+    """
+    if device != "auto":
+        return device
+    if FASTER_WHISPER_AVAILABLE:
+        import ctranslate2
+        return "cuda" if ctranslate2.get_cuda_device_count() > 0 else "cpu"
+    if whisper is not None:
+        import torch
+        return "cuda" if torch.cuda.is_available() else "cpu"
+    return "cpu"
+
+# Whisper model size to load, e.g. "tiny", "base", "small" or "large-v3"
+WHISPER_MODEL_NAME = os.getenv("WHISPER_MODEL", "base")
+# Device to run Whisper on: "cpu", "cuda" or "auto" (CUDA when available). "auto" is resolved
+# here, once, so the precision default and the worker pool decision both see the real device.
+WHISPER_DEVICE = _resolve_device(os.getenv("WHISPER_DEVICE", "cpu"))
+# faster-whisper weight/compute precision: int8 on CPU, int8 weights with float16 compute on GPU
+WHISPER_COMPUTE_TYPE = os.getenv(
+    "WHISPER_COMPUTE_TYPE", "int8" if WHISPER_DEVICE == "cpu" else "int8_float16"
+)
+# Optional directory for downloaded models, e.g. a persistent volume so restarts load from disk
+WHISPER_MODEL_DIR = os.getenv("WHISPER_MODEL_DIR") or None
+
+# The model is loaded once per process on first use and shared by all requests.
+# The lock also serializes transcription: Whisper installs per-call decoder hooks
+# on the model, so concurrent transcribe() calls on one model would interfere.
+_WHISPER_MODEL = None
+_WHISPER_MODEL_LOCK = threading.Lock()
+
+# Worker processes for transcribing several voice notes at once on CPU. The cores are split
+# between the workers, and the pool is created on first use and shared by all requests, so
+# each worker loads its Whisper model once and keeps it for the life of the process.
+NUM_TRANSCRIPTION_WORKERS = max(1, (os.cpu_count() or 1) // 2)
+_WORKER_POOL = None
+_WORKER_POOL_LOCK = threading.Lock()
+
+def _load_model(model_name: str, num_threads: int = 0):
+    """
+    Loads a Whisper model with the best available backend.
+
+    Args:
+        model_name: The Whisper model size to load.
+        num_threads: CPU threads to use for inference, or 0 for the backend's default.
+    """
+    if FASTER_WHISPER_AVAILABLE:
+        return WhisperModel(
+            model_name,
+            device=WHISPER_DEVICE,
+            compute_type=WHISPER_COMPUTE_TYPE,
+            cpu_threads=num_threads,
+            download_root=WHISPER_MODEL_DIR,
+        )
+    if num_threads:
+        import torch
+        torch.set_num_threads(num_threads)
+    return whisper.load_model(model_name, device=WHISPER_DEVICE, download_root=WHISPER_MODEL_DIR)
+
+def _run_model(model, audio_path: str) -> str:
+    """
+    Transcribes a single audio file with the given model and returns the text.
+    """
+    if FASTER_WHISPER_AVAILABLE:
+        # Segments are decoded lazily while they are iterated
+        segments, _ = model.transcribe(audio_path)
+        return "".join(segment.text for segment in segments)
+    # Half precision is only supported on GPU
+    return model.transcribe(audio_path, fp16=model.device.type == "cuda")["text"]
+
+def _get_model():
+    """
+    Returns the shared Whisper model, loading it on first use.
+    Must be called with _WHISPER_MODEL_LOCK held.
+    """
+    global _WHISPER_MODEL
+    if _WHISPER_MODEL is None:
+        logger.info("🔧 Loading Whisper model (%s)...", WHISPER_MODEL_NAME)
+        _WHISPER_MODEL = _load_model(WHISPER_MODEL_NAME)
+        logger.info("✅ Whisper model loaded successfully")
+    return _WHISPER_MODEL
+
+def _worker_init(model_name: str, num_threads: int) -> None:
+    """
+    Initializes a transcription worker process by loading its own Whisper model.
+    """
+    global _WHISPER_MODEL
+    # Whisper is multi-threaded internally; split the cores between the workers
+    _WHISPER_MODEL = _load_model(model_name, num_threads)
+
+def _worker_transcribe(audio_path: str) -> str:
+    """
+    Transcribes a single audio file with the worker's model and returns the text.
+    """
+    return _run_model(_WHISPER_MODEL, audio_path)
+
+def _get_worker_pool() -> ProcessPoolExecutor:
+    """
+    Returns the shared transcription worker pool, creating it on first use.
+    """
+    global _WORKER_POOL
+    with _WORKER_POOL_LOCK:
+        if _WORKER_POOL is None:
+            logger.info("🚀 Starting %s transcription worker processes", NUM_TRANSCRIPTION_WORKERS)
+            _WORKER_POOL = ProcessPoolExecutor(
+                max_workers=NUM_TRANSCRIPTION_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_worker_init,
+                initargs=(WHISPER_MODEL_NAME, max(1, (os.cpu_count() or 1) // NUM_TRANSCRIPTION_WORKERS)),
+            )
+        return _WORKER_POOL
+
+def _discard_worker_pool(pool: ProcessPoolExecutor) -> None:
+    """
+    Drops a broken worker pool so that the next transcription starts a fresh one.
+    """
+    global _WORKER_POOL
+    with _WORKER_POOL_LOCK:
+        if _WORKER_POOL is pool:
+            _WORKER_POOL = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def _transcribe_in_process(audio_path: str) -> str:
+    """
+    Transcribes a single audio file with this process's shared model.
+    """
+    with _WHISPER_MODEL_LOCK:
+        return _run_model(_get_model(), audio_path)
+
 def transcribe_audio_files(
     media_files: List[Tuple[str, str]], 
     df: pd.DataFrame
@@ -33,51 +181,78 @@ def transcribe_audio_files(
     logger.info("=" * 60)
     logger.info("🎙️  TRANSCRIPTION FUNCTION CALLED")
     logger.info("=" * 60)
-    logger.info(f"Total media files received: {len(media_files)}")
+    logger.info("Total media files received: %s", len(media_files))
     
     if not WHISPER_AVAILABLE:
         logger.warning("❌ Whisper not installed. Skipping transcription.")
-        logger.info("💡 To enable transcription, install: pip install openai-whisper")
+        logger.info("💡 To enable transcription, install: pip install faster-whisper")
         # Return a mock transcription so the frontend can display a message
         return [{
             "timestamp": pd.Timestamp.now(),
             "sender": "System",
-            "message": "Voice note transcription was enabled, but the 'openai-whisper' package is not installed. Please install it to use this feature.",
+            "message": "Voice note transcription was enabled, but neither 'faster-whisper' nor 'openai-whisper' is installed. Please install one to use this feature.",
             "message_type": "system",
             "media_filename": None
         }]
 
-    logger.info("🔧 Loading Whisper model (base)...")
-    model = whisper.load_model("base")
-    logger.info("✅ Whisper model loaded successfully")
     transcriptions = []
 
     audio_files = [
         (path, name) for path, name in media_files 
-        if name.endswith(('.opus', '.ogg', '.mp3', '.m4a'))
+        if name.lower().endswith(AUDIO_EXTENSIONS)
     ]
     
-    logger.info(f"🎵 Found {len(audio_files)} audio files to transcribe")
-    logger.info(f"Audio file types: {set([name.split('.')[-1] for _, name in audio_files])}")
+    logger.info("🎵 Found %s audio files to transcribe", len(audio_files))
+    logger.info("Audio file types: %s", set([name.split('.')[-1] for _, name in audio_files]))
+
+    # Index the referenced media once (first mention wins) instead of scanning the chat per file
+    lookup = (
+        df.dropna(subset=["media_filename"])
+        .drop_duplicates("media_filename")
+        .set_index("media_filename")[["timestamp", "sender"]]
+    )
 
-    for idx, (audio_path, audio_filename) in enumerate(audio_files, 1):
-        logger.info(f"\n📝 Processing audio {idx}/{len(audio_files)}: {audio_filename}")
+    # Resolve the sender and timestamp of every voice note before transcribing anything
+    jobs = []
+    for audio_path, audio_filename in audio_files:
         # Find the corresponding message in the DataFrame
-        voice_note_reference = df[df["media_filename"] == audio_filename]
-        
-        if not voice_note_reference.empty:
-            timestamp = voice_note_reference.iloc[0]["timestamp"]
-            sender = voice_note_reference.iloc[0]["sender"]
-            logger.info(f"   👤 Sender: {sender}")
-            logger.info(f"   📅 Timestamp: {timestamp}")
+        if audio_filename in lookup.index:
+            timestamp, sender = lookup.loc[audio_filename]
+            jobs.append((audio_path, audio_filename, timestamp, sender))
+        else:
+            logger.warning("   ⚠️ No matching message found in DataFrame for: %s", audio_filename)
+
+    # Several voice notes on CPU are decoded at once by the shared worker pool. A single note,
+    # or any work on a GPU (already kept busy by one model), uses this process's shared model.
+    pool = None
+    if WHISPER_DEVICE == "cpu" and len(jobs) > 1 and NUM_TRANSCRIPTION_WORKERS > 1:
+        logger.info("🚀 Transcribing %s audio files in the worker pool", len(jobs))
+        pool = _get_worker_pool()
+        pending = []
+        for audio_path, *_ in jobs:
+            try:
+                pending.append(pool.submit(_worker_transcribe, audio_path))
+            except BrokenProcessPool as e:
+                # A worker died while the files were being queued; the rest fail like the queued ones
+                failed = Future()
+                failed.set_exception(e)
+                pending.append(failed)
+
+    try:
+        for idx, (audio_path, audio_filename, timestamp, sender) in enumerate(jobs, 1):
+            logger.debug("\n📝 Processing audio %s/%s: %s", idx, len(jobs), audio_filename)
+            logger.debug("   👤 Sender: %s", sender)
+            logger.debug("   📅 Timestamp: %s", timestamp)
             
             try:
                 # Transcribe audio
-                logger.info(f"   🎤 Starting transcription of: {audio_filename}")
-                result = model.transcribe(audio_path, fp16=False)
-                transcribed_text = result["text"]
-                logger.info(f"   ✅ Successfully transcribed!")
-                logger.info(f"   💬 Text: {transcribed_text[:100]}{'...' if len(transcribed_text) > 100 else ''}")
+                if pool is not None:
+                    transcribed_text = pending[idx - 1].result()
+                else:
+                    logger.debug("   🎤 Starting transcription of: %s", audio_filename)
+                    transcribed_text = _transcribe_in_process(audio_path)
+                logger.debug("   ✅ Successfully transcribed!")
+                logger.debug("   💬 Text: %s%s", transcribed_text[:100], '...' if len(transcribed_text) > 100 else '')
 
                 transcriptions.append({
                     "timestamp": timestamp,
@@ -87,7 +262,10 @@ def transcribe_audio_files(
                     "media_filename": None
                 })
             except Exception as e:
-                logger.error(f"   ❌ Error transcribing {audio_filename}: {e}")
+                if isinstance(e, BrokenProcessPool):
+                    # A worker died (e.g. out of memory); replace the pool for later requests
+                    _discard_worker_pool(pool)
+                logger.error("   ❌ Error transcribing %s: %s", audio_filename, e)
                 transcriptions.append({
                     "timestamp": timestamp,
                     "sender": sender,
@@ -95,12 +273,15 @@ def transcribe_audio_files(
                     "message_type": "system",
                     "media_filename": audio_filename
                 })
-        else:
-            logger.warning(f"   ⚠️ No matching message found in DataFrame for: {audio_filename}")
+    finally:
+        if pool is not None:
+            # Don't leave this request's unfinished files queued in the shared pool
+            for future in pending:
+                future.cancel()
     
-    logger.info(f"\n{'=' * 60}")
-    logger.info(f"✅ TRANSCRIPTION COMPLETE: {len(transcriptions)} audio files transcribed")
-    logger.info(f"{'=' * 60}\n")
+    logger.info("\n%s", '=' * 60)
+    logger.info("✅ TRANSCRIPTION COMPLETE: %s audio files transcribed", len(transcriptions))
+    logger.info("%s\n", '=' * 60)
     return transcriptions
 
 def merge_transcriptions_into_chat(
@@ -108,7 +289,9 @@ def merge_transcriptions_into_chat(
     transcriptions: List[Dict[str, Any]]
 ) -> pd.DataFrame:
     """
-    Merges transcriptions back into the main DataFrame and sorts by time.
+    Merges transcriptions back into the main DataFrame in time order.
+    Both sides are already (or cheaply) sorted, so they are merged in linear time
+    instead of re-sorting the whole chat.
     """
     logger.info("🔄 Merging transcriptions into chat DataFrame...")
     
@@ -116,18 +299,27 @@ def merge_transcriptions_into_chat(
         logger.info("   ℹ️  No transcriptions to merge")
         return df
 
-    trans_df = pd.DataFrame(transcriptions)
-    logger.info(f"   📊 Created transcription DataFrame with {len(trans_df)} rows")
+    # Voice notes arrive in file order; there are few of them, so sorting is cheap
+    trans_df = pd.DataFrame(transcriptions).sort_values(by="timestamp", kind="stable")
+    logger.info("   📊 Created transcription DataFrame with %s rows", len(trans_df))
     
     # Remove original voice note references
     original_count = len(df)
-    df_no_voice_notes = df[df["message_type"] != "voice_note"].copy()
+    df_no_voice_notes = df[df["message_type"] != "voice_note"]
+    if not df_no_voice_notes["timestamp"].is_monotonic_increasing:
+        df_no_voice_notes = df_no_voice_notes.sort_values(by="timestamp", kind="stable")
     voice_notes_removed = original_count - len(df_no_voice_notes)
-    logger.info(f"   🗑️  Removed {voice_notes_removed} original voice note placeholders")
+    logger.info("   🗑️  Removed %s original voice note placeholders", voice_notes_removed)
     
-    # Combine and sort
+    # Find where each transcription falls among the chat messages (after any with the same
+    # timestamp), then interleave the rows in a single take instead of sorting everything
+    positions = np.searchsorted(
+        df_no_voice_notes["timestamp"].to_numpy(), trans_df["timestamp"].to_numpy(), side="right"
+    )
+    chat_rows = np.arange(len(df_no_voice_notes))
+    transcription_rows = np.arange(len(df_no_voice_notes), len(df_no_voice_notes) + len(trans_df))
     combined_df = pd.concat([df_no_voice_notes, trans_df], ignore_index=True)
-    combined_df = combined_df.sort_values(by="timestamp").reset_index(drop=True)
-    logger.info(f"   ✅ Merged and sorted. Final DataFrame has {len(combined_df)} rows")
+    combined_df = combined_df.take(np.insert(chat_rows, positions, transcription_rows)).reset_index(drop=True)
+    logger.info("   ✅ Merged and sorted. Final DataFrame has %s rows", len(combined_df))
     
     return combined_df
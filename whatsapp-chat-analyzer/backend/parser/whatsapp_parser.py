@@ -1,12 +1,17 @@
 import re
 import pandas as pd
 import logging
-from typing import List, Dict, Any
+from typing import List, Any, Iterator, TextIO
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# RE2 matches in guaranteed linear time (no backtracking), so prefer it for scanning whole exports
+try:
+    import re2
+    regex_engine = re2
+except ImportError:
+    regex_engine = re
+
 # Regex to parse a WhatsApp chat line
 # Handles both 12-hour and 24-hour time formats, with or without seconds.
 # Example: [31/12/2023, 10:00:05 PM] John Doe: Message
@@ -17,19 +22,122 @@ WHATSAPP_CHAT_REGEX = re.compile(
     re.IGNORECASE
 )
 
-# Alternative regex for older format with hyphen instead of brackets
-WHATSAPP_LEGACY_REGEX = re.compile(
-    r"(\d{1,2}/\d{1,2}/\d{2,4},\s*\d{1,2}:\d{2}(?::\d{2})?\s*(?:[AP]M)?)\s-\s([^:]+):\s?(.*)",
-    re.IGNORECASE
-)
-
-# Regex for system messages like "Messages are end-to-end encrypted"
-SYSTEM_MESSAGE_REGEX = re.compile(
-    r"\[(\d{1,2}/\d{1,2}/\d{2,4},\s*\d{1,2}:\d{2}(?::\d{2})?\s*(?:[AP]M)?)\]\s([^:]+):\s?(.+)"
+# Both header formats combined into one multiline pattern, so the whole export is scanned in a
+# single pass. `[^\S\n]` stands in for `\s` so a header never spills onto the next line.
+# Flags are inline because the pattern is compiled by RE2 when it is available.
+# Groups: 1/2 -> timestamp string (bracket/legacy format), 3 -> sender name, 4 -> message text
+TIMESTAMP_PATTERN = r"\d{1,2}/\d{1,2}/\d{2,4},[^\S\n]*\d{1,2}:\d{2}(?::\d{2})?[^\S\n]*(?:[AP]M)?"
+CHAT_HEADER_REGEX = regex_engine.compile(
+    rf"(?im)^(?:\[({TIMESTAMP_PATTERN})\][^\S\n]|({TIMESTAMP_PATTERN})[^\S\n]-[^\S\n])([^:\n]+):[^\S\n]?(.*)"
 )
 
 MEDIA_OMITTED_MSG = "<Media omitted>"
 
+# Invisible Unicode spacing characters that appear in some exports, and their replacements.
+# Applied with str.replace on the whole text: each call is a fast C scan that returns the text
+# untouched when the character is absent, whereas str.translate walks non-ASCII text per character.
+INVISIBLE_CHARS = {
+    '\u202f': ' ',   # narrow no-break space
+    '\u200e': '',    # left-to-right mark
+    '\u2028': ' ',   # line separator
+}
+
+# Candidate timestamp formats, matched against timestamps with all whitespace removed (exports
+# differ in whether they put a space before AM/PM). Month-first comes first, so it wins when a
+# chat's dates are ambiguous; day-first exports are recognised by their days after the 12th.
+DATE_FORMATS = ["%m/%d/%y", "%m/%d/%Y", "%d/%m/%y", "%d/%m/%Y"]
+TIME_FORMATS = ["%I:%M:%S%p", "%I:%M%p", "%H:%M:%S", "%H:%M"]
+TIMESTAMP_FORMATS = [f"{date},{time}" for date in DATE_FORMATS for time in TIME_FORMATS]
+
+# Characters read from the export per parsing step (about 1-4 MB of text)
+READ_BLOCK_SIZE = 1 << 20
+
+def iter_line_blocks(f: TextIO, block_size: int = READ_BLOCK_SIZE) -> Iterator[str]:
+    """
+    Reads an open text file in blocks of roughly block_size characters that end on a line boundary.
+
+    Args:
+        f: The open text file.
+        block_size: The number of characters to read before completing the current line.
+
+    Returns:
+        An iterator over the blocks; joined together they are the whole file.
+    """
+    while True:
+        block = f.read(block_size)
+        if not block:
+            return
+        if not block.endswith('\n'):
+            block += f.readline()
+        yield block
+
+def log_first_lines(text: str) -> None:
+    """
+    Logs the first lines of the chat text and tests the chat regex on the first one,
+    to help debug format issues.
+    """
+    first_lines = text.split('\n', 5)[:5] if text else []
+    if not first_lines:
+        return
+
+    logger.debug("📝 First 5 lines of the chat file:")
+    for i, line in enumerate(first_lines, 1):
+        logger.debug("   Line %s: %s", i, line.strip()[:100])
+
+    # Debug: Test regex on first line
+    test_line = first_lines[0]
+    logger.debug("🧪 Testing regex on first line:")
+    logger.debug("   Line: %s", test_line.strip()[:100])
+    test_match = CHAT_HEADER_REGEX.match(test_line)
+    if test_match:
+        logger.debug("   ✅ CHAT_HEADER_REGEX matched!")
+        logger.debug("   Groups: %s", test_match.groups())
+    else:
+        logger.debug("   ❌ CHAT_HEADER_REGEX did not match")
+        logger.debug("   Regex pattern: %s", CHAT_HEADER_REGEX.pattern)
+
+def parse_timestamps(timestamp_strs: pd.Series, sample_size: int = 1000) -> pd.Series:
+    """
+    Converts WhatsApp timestamp strings to datetimes.
+
+    An export uses a single timestamp format, so it is detected once from an evenly spaced
+    sample and the whole column is parsed with it on pandas' vectorized path. Only strings
+    that do not fit the detected format fall back to per-element inference.
+
+    Args:
+        timestamp_strs: The timestamp strings captured from the message headers.
+        sample_size: The approximate number of timestamps used to detect the format.
+
+    Returns:
+        A Series of datetimes, with NaT where a timestamp could not be parsed.
+    """
+    compact_strs = timestamp_strs.str.replace(r"\s+", "", regex=True)
+    sample = compact_strs.iloc[::max(1, len(compact_strs) // sample_size)]
+
+    detected_format = None
+    detected_count = 0
+    for timestamp_format in TIMESTAMP_FORMATS:
+        parsed_count = pd.to_datetime(sample, format=timestamp_format, errors='coerce').notna().sum()
+        if parsed_count > detected_count:
+            detected_format, detected_count = timestamp_format, parsed_count
+
+    if detected_format is None:
+        logger.warning("⚠️  Could not detect the timestamp format, inferring it per timestamp")
+        return pd.to_datetime(timestamp_strs, errors='coerce', format='mixed')
+    logger.info("🕒 Detected timestamp format: %s", detected_format)
+
+    timestamps = pd.to_datetime(compact_strs, format=detected_format, errors='coerce')
+    failed = timestamps.isna()
+    if failed.any():
+        logger.warning("⚠️  %s timestamps do not match the detected format, inferring them individually", failed.sum())
+        timestamps[failed] = pd.to_datetime(
+            timestamp_strs[failed],
+            errors='coerce',
+            format='mixed',
+            dayfirst=detected_format.startswith("%d"),
+        )
+    return timestamps
+
 def parse_chat_file(file_path: str) -> pd.DataFrame:
     """
     Parses a WhatsApp chat export file (.txt).
@@ -40,135 +148,98 @@ def parse_chat_file(file_path: str) -> pd.DataFrame:
     Returns:
         A pandas DataFrame with columns: timestamp, sender, message, message_type, media_filename.
     """
-    logger.info(f"📖 Starting to parse chat file: {file_path}")
-    
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-        logger.info(f"✅ Successfully read {len(lines)} lines from file")
-    except Exception as e:
-        logger.error(f"❌ Error reading file: {e}")
-        return pd.DataFrame()
+    logger.info("📖 Starting to parse chat file: %s", file_path)
     
-    # Log first few lines to help debug format issues
-    if lines:
-        logger.info("📝 First 5 lines of the chat file:")
-        for i, line in enumerate(lines[:5], 1):
-            logger.info(f"   Line {i}: {line.strip()[:100]}")
-
-    chat_data: List[Dict[str, Any]] = []
-    current_message_lines: List[str] = []
+    timestamp_strs: List[str] = []
+    senders: List[str] = []
+    message_parts: List[List[str]] = []  # First line and continuation lines of each message
+    message_types: List[str] = []
+    media_filenames: List[Any] = []
+    line_count = 0
     matched_count = 0
     unmatched_count = 0
     unmatched_samples = []  # Store first 3 unmatched lines for debugging
+
+    # The file is streamed in line-aligned blocks so that only one block of text is held
+    # in memory at a time; a message's continuation lines may carry over into the next block.
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            for block_idx, block in enumerate(iter_line_blocks(f)):
+                # Drop the block's final newline so that splitting on "\n" yields exactly its lines
+                if block.endswith('\n'):
+                    block = block[:-1]
+                line_count += block.count('\n') + 1
+
+                # Normalize invisible Unicode spacing characters once per block
+                for char, replacement in INVISIBLE_CHARS.items():
+                    block = block.replace(char, replacement)
+
+                if block_idx == 0 and logger.isEnabledFor(logging.DEBUG):
+                    log_first_lines(block)
+
+                # Find every message header in the block at once
+                headers = list(CHAT_HEADER_REGEX.finditer(block))
+                matched_count += len(headers)
+
+                # Lines before the block's first header continue the previous message, if any
+                leading_end = headers[0].start() if headers else len(block) + 1
+                leading_lines = [line.strip() for line in block[:leading_end - 1].split('\n')] if leading_end else []
+                if message_parts:
+                    message_parts[-1].extend(leading_lines)
+                else:
+                    unmatched_count += len(leading_lines)
+                    unmatched_samples.extend(leading_lines[:3 - len(unmatched_samples)])
+
+                next_starts = [match.start() for match in headers[1:]] + [len(block) + 1]
+                for match, next_start in zip(headers, next_starts):
+                    bracket_timestamp, legacy_timestamp, sender, message_text = match.groups()
+                    message_text = message_text.strip()
+
+                    # Classified inline: two substring checks per message are cheaper than pandas
+                    # .str operations over the collected column, which loop per element in Python
+                    # (or fall back to it for partition/split, even on Arrow-backed strings)
+                    message_type = "text"
+                    media_filename = None
+
+                    if MEDIA_OMITTED_MSG in message_text:
+                        message_type = "media"
+                        message_text = ""
+                    elif "(file attached)" in message_text:
+                        parts = message_text.split("(file attached)")
+                        media_filename = parts[0].strip()
+                        message_text = ""
+                        message_type = "voice_note" if ".opus" in media_filename else "media"
+
+                    timestamp_strs.append(bracket_timestamp or legacy_timestamp)
+                    senders.append(sender)
+                    message_parts.append([message_text])
+                    message_types.append(message_type)
+                    media_filenames.append(media_filename)
+
+                    # Lines between this header and the next are a continuation of this message (multi-line)
+                    if match.end() < next_start - 1:
+                        continuation = block[match.end() + 1:next_start - 1]
+                        message_parts[-1].extend(line.strip() for line in continuation.split('\n'))
+    except (OSError, ValueError) as e:
+        logger.error("❌ Error reading file: %s", e)
+        return pd.DataFrame()
+
+    # Join each message's lines exactly once, skipping empty ones (e.g. blank lines or the
+    # cleared text of a media message)
+    messages = [' '.join(filter(None, parts)) for parts in message_parts]
+
+    logger.info("✅ Successfully read %s lines from file", line_count)
+
+    logger.info("📊 Parsing complete:")
+    logger.info("   ✅ Matched lines: %s", matched_count)
+    logger.info("   ⚠️  Unmatched lines: %s", unmatched_count)
+    logger.info("   📝 Total messages parsed: %s", len(messages))
     
-    # Debug: Test regex on first line
-    if lines:
-        test_line = lines[0].replace('\u202f', ' ').replace('\u200e', '').replace('\u2028', ' ')
-        logger.info(f"🧪 Testing regex on first line:")
-        logger.info(f"   Line: {test_line.strip()[:100]}")
-        test_match = WHATSAPP_CHAT_REGEX.match(test_line)
-        if test_match:
-            logger.info(f"   ✅ WHATSAPP_CHAT_REGEX matched!")
-            logger.info(f"   Groups: {test_match.groups()}")
-        else:
-            logger.warning(f"   ❌ WHATSAPP_CHAT_REGEX did not match")
-            logger.warning(f"   Regex pattern: {WHATSAPP_CHAT_REGEX.pattern}")
-    
-    for line in lines:
-        # Normalize invisible Unicode spacing characters that appear in some exports
-        normalized_line = (
-            line
-            .replace('\u202f', ' ')   # narrow no-break space
-            .replace('\u200e', '')    # left-to-right mark
-            .replace('\u2028', ' ')   # line separator
-        )
-        # Try matching the modern bracket format first: [DD/MM/YY, HH:MM:SS AM/PM] Name: Message
-        match = WHATSAPP_CHAT_REGEX.match(normalized_line)
-        
-        if not match:
-            # Try the legacy format with hyphen: DD/MM/YY, HH:MM AM/PM - Name: Message
-            match = WHATSAPP_LEGACY_REGEX.match(normalized_line)
-        
-        # Check for system messages (special invisible character after colon)
-        system_match = SYSTEM_MESSAGE_REGEX.match(normalized_line) if not match else None
-
-        if match:
-            matched_count += 1
-            # If we have a pending multi-line message, save it first
-            if current_message_lines:
-                chat_data[-1]['message'] += ' '.join(current_message_lines)
-                current_message_lines = []
-
-            # Extract data from the matched line
-            # Groups (with current regex):
-            #   1 -> timestamp string
-            #   2 -> sender name
-            #   3 -> message text
-            timestamp_str = match.group(1)
-            sender = match.group(2)
-            message_text = match.group(3).strip()
-
-            message_type = "text"
-            media_filename = None
-
-            if MEDIA_OMITTED_MSG in message_text:
-                message_type = "media"
-                message_text = ""
-            elif "(file attached)" in message_text:
-                parts = message_text.split("(file attached)")
-                media_filename = parts[0].strip()
-                message_text = ""
-                message_type = "voice_note" if ".opus" in media_filename else "media"
-            
-            chat_data.append({
-                "timestamp_str": timestamp_str,
-                "sender": sender,
-                "message": message_text,
-                "message_type": message_type,
-                "media_filename": media_filename,
-            })
-        elif system_match:
-            matched_count += 1
-            if current_message_lines:
-                chat_data[-1]['message'] += ' '.join(current_message_lines)
-                current_message_lines = []
-            # This is a system message (e.g., "Messages are end-to-end encrypted")
-            timestamp_str = system_match.group(1)
-            sender = system_match.group(2)
-            message_text = system_match.group(3).strip()
-            
-            chat_data.append({
-                "timestamp_str": timestamp_str,
-                "sender": "System",
-                "message": message_text,
-                "message_type": "system",
-                "media_filename": None,
-            })
-
-        elif chat_data:
-            # This is a continuation of the previous message (multi-line)
-            current_message_lines.append(normalized_line.strip())
-        else:
-            unmatched_count += 1
-            # Store first 3 unmatched lines for debugging
-            if len(unmatched_samples) < 3:
-                unmatched_samples.append(normalized_line.strip())
-
-    # Add the last multi-line message if it exists
-    if current_message_lines and chat_data:
-        chat_data[-1]['message'] += ' '.join(current_message_lines)
-
-    logger.info(f"📊 Parsing complete:")
-    logger.info(f"   ✅ Matched lines: {matched_count}")
-    logger.info(f"   ⚠️  Unmatched lines: {unmatched_count}")
-    logger.info(f"   📝 Total messages parsed: {len(chat_data)}")
-    
-    # Log unmatched samples for debugging
-    if unmatched_samples:
-        logger.warning(f"\n🔍 First {len(unmatched_samples)} unmatched lines (for debugging):")
+    # Log unmatched samples for debugging; the samples are only analyzed in debug mode
+    if unmatched_samples and logger.isEnabledFor(logging.DEBUG):
+        logger.debug("\n🔍 First %s unmatched lines (for debugging):", len(unmatched_samples))
         for i, sample in enumerate(unmatched_samples, 1):
-            logger.warning(f"   {i}. {sample[:100]}")
+            logger.debug("   %s. %s", i, sample[:100])
             
             # Analyze why it didn't match
             reasons = []
@@ -189,36 +260,37 @@ def parse_chat_file(file_path: str) -> pd.DataFrame:
                 if reasons == []:
                     reasons.append("Unknown - pattern should match but didn't")
             
-            logger.warning(f"      Reason: {', '.join(reasons)}")
+            logger.debug("      Reason: %s", ', '.join(reasons))
     
-    if not chat_data:
+    if not messages:
         logger.error("❌ No messages were parsed! The file format may not be recognized.")
         logger.error("💡 Expected format examples:")
         logger.error("   [31/12/2023, 10:00:05 PM] John Doe: Message")
         logger.error("   31/12/2023, 10:00 - John Doe: Message")
         return pd.DataFrame()
 
-    df = pd.DataFrame(chat_data)
-    logger.info(f"✅ Created DataFrame with {len(df)} rows")
+    df = pd.DataFrame({
+        "timestamp_str": timestamp_strs,
+        "sender": senders,
+        "message": messages,
+        "message_type": message_types,
+        "media_filename": media_filenames,
+    })
+    logger.info("✅ Created DataFrame with %s rows", len(df))
     
     # Convert timestamp string to datetime object
-    # The format can vary, so we let pandas infer it, but provide hints
-    try:
-        df['timestamp'] = pd.to_datetime(df['timestamp_str'], errors='coerce')
-    except Exception as e:
-        logger.warning(f"⚠️  Using fallback timestamp parsing: {e}")
-        df['timestamp'] = pd.to_datetime(df['timestamp_str'], errors='coerce', format='mixed')
+    df['timestamp'] = parse_timestamps(df['timestamp_str'])
 
     # Count how many timestamps failed to parse
     null_timestamps = df['timestamp'].isna().sum()
     if null_timestamps > 0:
-        logger.warning(f"⚠️  {null_timestamps} timestamps could not be parsed and will be dropped")
+        logger.warning("⚠️  %s timestamps could not be parsed and will be dropped", null_timestamps)
 
     df = df.dropna(subset=['timestamp']) # Drop rows where timestamp could not be parsed
-    logger.info(f"✅ After timestamp parsing: {len(df)} rows remain")
+    logger.info("✅ After timestamp parsing: %s rows remain", len(df))
     
     df = df.sort_values(by="timestamp").reset_index(drop=True)
     df = df.drop(columns=['timestamp_str'])
 
-    logger.info(f"🎉 Parsing successful! Returning DataFrame with {len(df)} messages")
+    logger.info("🎉 Parsing successful! Returning DataFrame with %s messages", len(df))
     return df[["timestamp", "sender", "message", "message_type", "media_filename"]]
@@ -1,84 +1,158 @@
 import zipfile
 import tempfile
+import io
 import os
 import logging
-from pathlib import Path
-from typing import Generator, Tuple, List
+from typing import BinaryIO, Generator, Tuple, List, Union
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def extract_zip(zip_file: bytes) -> tempfile.TemporaryDirectory:
+# Voice note formats that can be transcribed; other media in an export is never read
+AUDIO_EXTENSIONS = ('.opus', '.ogg', '.mp3', '.m4a')
+
+def extract_zip(
+    zip_file: Union[bytes, BinaryIO],
+    include_audio: bool = True
+) -> tempfile.TemporaryDirectory:
     """
-    Extracts a zip file into a temporary directory.
+    Extracts the chat text and audio files of a zip file into a temporary directory.
+    Images, videos and other attachments are never read, so they are not decompressed.
 
     Args:
-        zip_file: The content of the zip file in bytes.
+        zip_file: The zip content, either as bytes or as a seekable binary file object,
+            e.g. the spooled file behind an upload. It is read in place, never written
+            back to disk first.
+        include_audio: Whether to extract audio files too (only needed for transcription).
 
     Returns:
         A TemporaryDirectory object containing the extracted files.
     """
+    if isinstance(zip_file, (bytes, bytearray, memoryview)):
+        zip_file = io.BytesIO(zip_file)
+
     temp_dir = tempfile.TemporaryDirectory()
-    zip_path = Path(temp_dir.name) / "chat.zip"
 
-    with open(zip_path, "wb") as f:
-        f.write(zip_file)
+    extensions = ('.txt',) + AUDIO_EXTENSIONS if include_audio else ('.txt',)
 
-    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-        zip_ref.extractall(temp_dir.name)
-    
-    os.remove(zip_path) # Clean up the zip file after extraction
+    with zipfile.ZipFile(zip_file, 'r') as zip_ref:
+        members = [
+            member for member in zip_ref.infolist()
+            if not member.is_dir() and member.filename.lower().endswith(extensions)
+        ]
+        logger.info("📦 Extracting %s of %s archive entries", len(members), len(zip_ref.infolist()))
+        for member in members:
+            zip_ref.extract(member, temp_dir.name)
     
     return temp_dir
 
-def find_chat_file(temp_dir_path: str) -> str:
+def walk_extracted(temp_dir_path: str) -> Tuple[List[str], List[str], List[Tuple[str, str]]]:
     """
-    Finds the primary chat file - looks for any .txt file with 'chat' anywhere in the filename.
-    For example: "chat.txt", "WhatsApp Chat.txt", "my_chat_export.txt", "chat_with_john.txt" all work.
+    Walks the extracted directory once with os.scandir, in the same top-down order
+    as os.walk, and sorts every file into chat candidates or media.
 
     Args:
         temp_dir_path: The path to the temporary directory.
 
     Returns:
-        The full path to the chat file.
-
-    Raises:
-        FileNotFoundError: If no suitable chat file is found.
+        A tuple of (txt_files, chat_txt_files, media_files), where txt_files and
+        chat_txt_files are full paths and media_files are (file_path, file_name) tuples.
     """
-    logger.info(f"🔍 Searching for chat file in: {temp_dir_path}")
-    
     txt_files: List[str] = []
     chat_txt_files: List[str] = []
+    media_files: List[Tuple[str, str]] = []
 
-    for root, _, files in os.walk(temp_dir_path):
-        for file in files:
-            if file.lower().endswith(".txt"):
-                full_path = os.path.join(root, file)
-                txt_files.append(full_path)
-                logger.debug(f"   Found .txt file: {file}")
-                
-                # Check if 'chat' appears anywhere in the filename (case-insensitive)
-                if "chat" in file.lower():
-                    chat_txt_files.append(full_path)
-                    logger.info(f"   ✅ Found chat file: {file}")
-    
-    logger.info(f"📊 Found {len(txt_files)} total .txt files, {len(chat_txt_files)} with 'chat' in name")
+    pending_dirs = [temp_dir_path]
+    while pending_dirs:
+        subdirs = []
+        try:
+            with os.scandir(pending_dirs.pop()) as entries:
+                for entry in entries:
+                    # DirEntry caches the file type from the directory listing, so no extra stat is needed
+                    if entry.is_dir():
+                        if not entry.is_symlink():
+                            subdirs.append(entry.path)
+                    elif entry.name.lower().endswith(".txt"):
+                        txt_files.append(entry.path)
+                        logger.debug("   Found .txt file: %s", entry.name)
+
+                        # Check if 'chat' appears anywhere in the filename (case-insensitive)
+                        if "chat" in entry.name.lower():
+                            chat_txt_files.append(entry.path)
+                            logger.info("   ✅ Found chat file: %s", entry.name)
+                    else:
+                        media_files.append((entry.path, entry.name))
+        except OSError:
+            continue
+        # Visit subdirectories in listing order, like os.walk does
+        pending_dirs.extend(reversed(subdirs))
+
+    return txt_files, chat_txt_files, media_files
+
+def select_chat_file(txt_files: List[str], chat_txt_files: List[str]) -> str:
+    """
+    Picks the primary chat file, preferring .txt files with 'chat' in their name.
+
+    Args:
+        txt_files: Full paths of all .txt files found.
+        chat_txt_files: Full paths of the .txt files with 'chat' in their name.
+
+    Returns:
+        The full path to the chat file.
+
+    Raises:
+        FileNotFoundError: If no .txt file was found.
+    """
+    logger.info("📊 Found %s total .txt files, %s with 'chat' in name", len(txt_files), len(chat_txt_files))
     
     if chat_txt_files:
         # Prioritize files with "chat" in their name
         selected_file = chat_txt_files[0]
-        logger.info(f"✅ Selected chat file: {os.path.basename(selected_file)}")
+        logger.info("✅ Selected chat file: %s", os.path.basename(selected_file))
         return selected_file
     elif txt_files:
         # If no "chat" files, but other .txt files exist, pick the first one
         selected_file = txt_files[0]
-        logger.warning(f"⚠️  No 'chat' file found, using first .txt file: {os.path.basename(selected_file)}")
+        logger.warning("⚠️  No 'chat' file found, using first .txt file: %s", os.path.basename(selected_file))
         return selected_file
     else:
         logger.error("❌ No .txt files found in the ZIP archive")
         raise FileNotFoundError("Could not find any '.txt' chat file in the provided ZIP file.")
 
+def scan_extracted(temp_dir_path: str) -> Tuple[str, List[Tuple[str, str]]]:
+    """
+    Finds the chat file and all media files of an extracted export in a single directory walk.
+
+    Args:
+        temp_dir_path: The path to the temporary directory.
+
+    Returns:
+        A tuple of (chat_file_path, media_files), where media_files are (file_path, file_name) tuples.
+
+    Raises:
+        FileNotFoundError: If no suitable chat file is found.
+    """
+    logger.info("🔍 Scanning extracted files in: %s", temp_dir_path)
+    txt_files, chat_txt_files, media_files = walk_extracted(temp_dir_path)
+    return select_chat_file(txt_files, chat_txt_files), media_files
+
+def find_chat_file(temp_dir_path: str) -> str:
+    """
+    Finds the primary chat file - looks for any .txt file with 'chat' anywhere in the filename.
+    For example: "chat.txt", "WhatsApp Chat.txt", "my_chat_export.txt", "chat_with_john.txt" all work.
+
+    Args:
+        temp_dir_path: The path to the temporary directory.
+
+    Returns:
+        The full path to the chat file.
+
+    Raises:
+        FileNotFoundError: If no suitable chat file is found.
+    """
+    logger.info("🔍 Searching for chat file in: %s", temp_dir_path)
+    txt_files, chat_txt_files, _ = walk_extracted(temp_dir_path)
+    return select_chat_file(txt_files, chat_txt_files)
+
 def find_media_files(temp_dir_path: str) -> Generator[Tuple[str, str], None, None]:
     """
     Finds all media files (non-txt) in the extracted directory.
@@ -89,8 +163,5 @@ def find_media_files(temp_dir_path: str) -> Generator[Tuple[str, str], None, Non
     Yields:
         Tuples of (file_path, file_name).
     """
-    for root, _, files in os.walk(temp_dir_path):
-        for file in files:
-            if not file.lower().endswith(".txt"):
-                file_path = os.path.join(root, file)
-                yield file_path, file
+    _, _, media_files = walk_extracted(temp_dir_path)
+    yield from media_files
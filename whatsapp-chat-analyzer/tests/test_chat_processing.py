@@ -0,0 +1,108 @@
+"""
+Regression tests for the streaming chat parser, timestamp format detection and the
+vectorized word filter.
+
+Run from the whatsapp-chat-analyzer directory:
+    python -m pytest tests
+"""
+import random
+
+import pandas as pd
+import pytest
+
+from backend.parser import whatsapp_parser
+from backend.parser.whatsapp_parser import parse_chat_file, parse_timestamps
+from backend.analytics.linguistic import STOPWORDS, is_valid_word, valid_word_mask
+
+CHAT_LINES = [
+    "[1/15/24, 9:05:12 AM] Ann: Good morning",
+    "[1/15/24, 9:06:40 AM] Bob: Morning! Plans for today?",
+    "first continuation line",
+    "",
+    "  second continuation line  ",
+    "[1/15/24, 9:07:03 AM] Ann: <Media omitted>",
+    "[1/15/24, 9:07:30 AM] Bob: PTT-20240115-WA0001.opus (file attached)",
+    "[1/15/24, 9:08:02 AM] Ann: IMG-20240115-WA0002.jpg (file attached)",
+    "Look at this",
+    "[1/16/24, 10:15:00 PM] Bob: Sure: see you at 10",
+]
+
+
+def write_chat(tmp_path, lines):
+    chat_path = tmp_path / "_chat.txt"
+    chat_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(chat_path)
+
+
+def generate_chat_lines(num_messages=200, seed=0):
+    """Builds a chat with multi-line messages, media and a few blank lines."""
+    rnd = random.Random(seed)
+    bodies = ["hi", "How are you doing?", "<Media omitted>", "PTT-1.opus (file attached)",
+              "IMG-2.jpg (file attached)", "time: 10:30", ""]
+    lines = []
+    for i in range(num_messages):
+        hour, minute = divmod(i, 60)
+        sender = rnd.choice(["Ann", "Bob Smith"])
+        lines.append(f"[2/{1 + hour}/24, {1 + minute % 12}:{minute:02d}:00 PM] {sender}: {rnd.choice(bodies)}")
+        for _ in range(rnd.choice([0, 0, 0, 1, 3])):
+            lines.append(rnd.choice(["continued", "", "  more text  ", "a longer continuation line here"]))
+    return lines
+
+
+def parse_with_block_size(monkeypatch, chat_path, block_size):
+    if block_size is not None:
+        read_blocks = whatsapp_parser.iter_line_blocks
+        monkeypatch.setattr(whatsapp_parser, "iter_line_blocks", lambda f: read_blocks(f, block_size))
+    return parse_chat_file(chat_path)
+
+
+@pytest.mark.parametrize("block_size", [1, 17])
+def test_parsing_does_not_depend_on_block_size(tmp_path, monkeypatch, block_size):
+    chat_path = write_chat(tmp_path, generate_chat_lines())
+    expected = parse_chat_file(chat_path)
+    result = parse_with_block_size(monkeypatch, chat_path, block_size)
+    pd.testing.assert_frame_equal(result, expected)
+
+
+@pytest.mark.parametrize("block_size", [1, 17, None])
+def test_continuation_lines_are_joined_across_blocks(tmp_path, monkeypatch, block_size):
+    chat_path = write_chat(tmp_path, CHAT_LINES)
+    df = parse_with_block_size(monkeypatch, chat_path, block_size)
+
+    assert df["message"].tolist() == [
+        "Good morning",
+        "Morning! Plans for today? first continuation line second continuation line",
+        "",
+        "",
+        "Look at this",
+        "Sure: see you at 10",
+    ]
+    assert df["message_type"].tolist() == ["text", "text", "media", "voice_note", "media", "text"]
+    assert df["media_filename"].fillna("").tolist() == [
+        "", "", "", "PTT-20240115-WA0001.opus", "IMG-20240115-WA0002.jpg", "",
+    ]
+
+
+@pytest.mark.parametrize("timestamp_strs, expected", [
+    # Day-first: only the day-first format fits every date
+    (["13/01/24, 9:05 PM", "02/03/24, 10:00 AM"],
+     [pd.Timestamp(2024, 1, 13, 21, 5), pd.Timestamp(2024, 3, 2, 10, 0)]),
+    # Month-first
+    (["01/13/24, 9:05:30 PM", "03/02/24, 10:00:00 AM"],
+     [pd.Timestamp(2024, 1, 13, 21, 5, 30), pd.Timestamp(2024, 3, 2, 10, 0)]),
+    # 24-hour clock, day-first with four-digit years
+    (["31/12/2023, 22:15", "01/01/2024, 07:05", "15/06/2024, 00:30"],
+     [pd.Timestamp(2023, 12, 31, 22, 15), pd.Timestamp(2024, 1, 1, 7, 5), pd.Timestamp(2024, 6, 15, 0, 30)]),
+])
+def test_timestamp_format_detection(timestamp_strs, expected):
+    assert parse_timestamps(pd.Series(timestamp_strs)).tolist() == expected
+
+
+def test_valid_word_mask_matches_is_valid_word():
+    rnd = random.Random(0)
+    alphabet = "abcdefghijklmnopqrstuvwxyz0123456789_éñü"
+    tokens = ["".join(rnd.choice(alphabet) for _ in range(rnd.randint(1, 8))) for _ in range(5000)]
+    tokens += sorted(STOPWORDS) + ["hahaha", "ahhhh", "aab", "abab", "2024", "abc123", "x1_", "ñandú"]
+
+    expected = [is_valid_word(token) for token in tokens]
+    assert valid_word_mask(pd.Series(tokens, dtype=object)).tolist() == expected